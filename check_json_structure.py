@@ -7,8 +7,10 @@ import re
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Set
+from typing import Any, Iterable, List, Optional, Set
 
+from lib import instrument
+from lib.corpus import CorpusPass, Record, iter_dictionary_files, scan_corpus
 
 @dataclass(frozen=True)
 class Schema:
@@ -47,10 +49,23 @@ def main() -> int:
         default=None,
         help="Stop after validating this many files.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes used to scan the corpus (default: CPU count).",
+    )
+    instrument.add_arguments(parser)
     args = parser.parse_args()
 
+    with instrument.from_args(args, "check_json_structure"):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
     try:
-        instructions = extract_system_instructions(args.instructions_file)
+        with instrument.phase("schema"):
+            instructions = extract_system_instructions(args.instructions_file)
     except ValueError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 1
@@ -64,31 +79,72 @@ def main() -> int:
         return 1
 
     schema = build_schema(examples)
-    total = 0
-    failures = 0
-    invalid_files: List[Path] = []
-    for json_path in sorted(args.dictionary_dir.glob("*.json")):
-        total += 1
-        errors = validate_json_file(json_path, schema)
-        if errors:
-            failures += 1
-            print(f"{json_path}:")
-            for err in errors:
-                print(f"  - {err}")
-            invalid_files.append(json_path)
-        elif args.verbose:
-            print(f"{json_path}: OK")
+    try:
+        files = iter_dictionary_files(args.dictionary_dir)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
 
-        if args.limit is not None and total >= args.limit:
-            break
+    if args.limit is not None:
+        files = files[: args.limit]
+
+    return scan_corpus(
+        files, [ValidatePass(schema, verbose=args.verbose)], workers=args.workers
+    )
 
-    if failures:
-        print(f"\nValidation failed for {failures} of {total} files.")
-        prompt_delete_and_regenerate(invalid_files)
-        return 1
 
-    print(f"All {total} files passed validation.")
-    return 0
+class ValidatePass(CorpusPass):
+    """
+    Check every entry against the schema derived from system_instructions.
+
+    Failing records are marked ``invalid`` so that passes running after this
+    one (pack, publish) can leave them out. With ``prompt=False`` the
+    deletion prompt is skipped.
+    """
+
+    name = "validate"
+
+    def __init__(
+        self, schema: Schema, verbose: bool = False, prompt: bool = True
+    ) -> None:
+        self.schema = schema
+        self.verbose = verbose
+        self.prompt = prompt
+
+    def begin(self) -> None:
+        self._total = 0
+        self._invalid_files: List[Path] = []
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None:
+            errors = [f"Invalid JSON: {record.error}"]
+        else:
+            errors = validate_data(record.data, self.schema)
+        record.invalid = bool(errors)
+        return errors
+
+    def collect(self, path: Path, result: Any) -> None:
+        self._total += 1
+        if result:
+            print(f"{path}:")
+            for err in result:
+                print(f"  - {err}")
+            self._invalid_files.append(path)
+        elif self.verbose:
+            print(f"{path}: OK")
+
+    def finish(self) -> int:
+        if self._invalid_files:
+            print(
+                f"\nValidation failed for {len(self._invalid_files)} "
+                f"of {self._total} files."
+            )
+            if self.prompt:
+                prompt_delete_and_regenerate(self._invalid_files)
+            return 1
+
+        print(f"All {self._total} files passed validation.")
+        return 0
 
 
 def extract_system_instructions(instructions_path: Path) -> str:
@@ -221,6 +277,10 @@ def validate_json_file(path: Path, schema: Schema) -> List[str]:
     except json.JSONDecodeError as exc:
         return [f"Invalid JSON: {exc}"]
 
+    return validate_data(data, schema)
+
+
+def validate_data(data: Any, schema: Schema) -> List[str]:
     if not isinstance(data, dict):
         return ["Top-level JSON element must be an object."]
 
@@ -5,7 +5,10 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Any, Iterable, Tuple
+from typing import Any, Tuple
+
+from lib import instrument
+from lib.corpus import CorpusPass, Record, iter_dictionary_files, scan_corpus
 
 
 def main() -> int:
@@ -32,10 +35,22 @@ def main() -> int:
         default=2,
         help="Indentation level for rewritten JSON files.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes used to scan the corpus (default: CPU count).",
+    )
+    instrument.add_arguments(parser)
     args = parser.parse_args()
 
+    with instrument.from_args(args, "clean_json_entries"):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
     try:
-        files = sorted(iter_dictionary_files(args.dictionary_dir))
+        files = iter_dictionary_files(args.dictionary_dir)
     except ValueError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 1
@@ -44,54 +59,83 @@ def main() -> int:
         print("No JSON files found to clean.", file=sys.stderr)
         return 1
 
-    total = 0
-    changed = 0
-    skipped = 0
+    return scan_corpus(
+        files, [CleanPass(apply=args.apply, indent=args.indent)], workers=args.workers
+    )
 
-    for path in files:
-        total += 1
-        try:
-            original_text = path.read_text(encoding="utf-8")
-            data = json.loads(original_text)
-        except (OSError, json.JSONDecodeError) as exc:
-            skipped += 1
-            print(f"Skipping {path}: {exc}", file=sys.stderr)
-            continue
-
-        cleaned, removed_any = clean_value(data)
+
+class CleanPass(CorpusPass):
+    """
+    Drop empty values from every entry.
+
+    With ``apply`` set the cleaned entry is written back in the worker and
+    replaces the record, so passes scheduled after this one see clean data.
+    """
+
+    name = "clean"
+
+    def __init__(self, apply: bool = False, indent: int = 2) -> None:
+        self.apply = apply
+        self.indent = indent
+
+    def begin(self) -> None:
+        self._total = 0
+        self._changed = 0
+        self._skipped = 0
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None:
+            return "skipped", record.error
+
+        cleaned, removed_any = clean_value(record.data)
         if cleaned is None:
             cleaned = {}
 
         if not removed_any:
-            continue
-
-        changed += 1
-        if args.apply:
-            try:
-                path.write_text(
-                    json.dumps(cleaned, ensure_ascii=False, indent=args.indent) + "\n",
-                    encoding="utf-8",
-                )
-                print(f"Cleaned {path}")
-            except OSError as exc:
-                skipped += 1
-                print(f"Failed to write {path}: {exc}", file=sys.stderr)
-        else:
-            print(f"[Dry Run] Would clean {path}")
+            return None
 
-    mode = "Dry run" if not args.apply else "Apply"
-    print(
-        f"{mode} complete. Processed {total} files, cleaned {changed}, skipped {skipped}."
-    )
-    return 0
+        if not self.apply:
+            return "dry-run", None
 
+        raw = (
+            json.dumps(cleaned, ensure_ascii=False, indent=self.indent) + "\n"
+        ).encode("utf-8")
+        try:
+            record.path.write_bytes(raw)
+        except OSError as exc:
+            return "failed", str(exc)
+
+        record.raw = raw
+        record.data = cleaned
+        return "cleaned", None
+
+    def collect(self, path: Path, result: Any) -> None:
+        self._total += 1
+        if result is None:
+            return
+
+        status, message = result
+        if status == "skipped":
+            self._skipped += 1
+            print(f"Skipping {path}: {message}", file=sys.stderr)
+            return
+
+        self._changed += 1
+        if status == "cleaned":
+            print(f"Cleaned {path}")
+        elif status == "failed":
+            self._skipped += 1
+            print(f"Failed to write {path}: {message}", file=sys.stderr)
+        else:
+            print(f"[Dry Run] Would clean {path}")
 
-def iter_dictionary_files(directory: Path) -> Iterable[Path]:
-    if not directory.exists():
-        raise ValueError(f"Dictionary directory not found: {directory}")
-    if not directory.is_dir():
-        raise ValueError(f"Dictionary path is not a directory: {directory}")
-    return directory.glob("*.json")
+    def finish(self) -> int:
+        mode = "Dry run" if not self.apply else "Apply"
+        print(
+            f"{mode} complete. Processed {self._total} files, "
+            f"cleaned {self._changed}, skipped {self._skipped}."
+        )
+        return 0
 
 
 def clean_value(value: Any) -> Tuple[Any, bool]:
@@ -2,6 +2,10 @@ from os import remove
 from pathlib import Path
 from wordfreq import top_n_list
 
+def is_generatable(word: str) -> bool:
+  """Whether a word passes the filter used to build words.txt."""
+  return len(word) > 1 and word.isalpha()
+
 def build_words_list(path: str = 'words.txt', lang: str = 'en', size: int = 26000) -> None:
   file = Path(path)
   if not file.exists():
@@ -9,7 +13,7 @@ def build_words_list(path: str = 'words.txt', lang: str = 'en', size: int = 2600
     # Filter out unwanted words
     filtered_words = [
       word for word in words
-      if len(word) > 1 and word.isalpha()
+      if is_generatable(word)
     ]
     file.write_text('\n'.join(filtered_words))
   else:
@@ -0,0 +1,395 @@
+"""
+Single-pass scanner for the dictionary corpus.
+
+Each file in ``dictionary/`` is read and decoded exactly once; the parsed
+entry is then handed to every requested pass in turn. Files are spread over
+a process pool, while results are collected in the parent in sorted file
+order so that reports stay deterministic.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from lib import instrument
+
+
+@dataclass
+class Record:
+    path: Path
+    raw: bytes = b""
+    data: Any = None
+    error: Optional[str] = None
+    # Set by the validate pass so later passes can leave the entry out.
+    invalid: bool = False
+
+
+class CorpusPass:
+    """
+    A unit of work run over every entry of the corpus.
+
+    ``process`` runs in a worker process and must return a picklable value.
+    ``begin``, ``collect`` and ``finish`` run in the parent process; ``collect``
+    is called once per file in sorted order and ``finish`` returns an exit
+    status. Attributes whose names start with an underscore are parent-only
+    state and are not shipped to workers.
+    """
+
+    name = "pass"
+
+    def begin(self) -> None:
+        pass
+
+    def process(self, record: Record) -> Any:
+        return None
+
+    def collect(self, path: Path, result: Any) -> None:
+        pass
+
+    def finish(self) -> int:
+        return 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if not key.startswith("_")
+        }
+
+
+def iter_dictionary_files(directory: Path) -> List[Path]:
+    if not directory.exists():
+        raise ValueError(f"Dictionary directory not found: {directory}")
+    if not directory.is_dir():
+        raise ValueError(f"Dictionary path is not a directory: {directory}")
+    return sorted(directory.glob("*.json"))
+
+
+def _read(record: Record) -> None:
+    try:
+        record.raw = record.path.read_bytes()
+    except OSError as exc:
+        record.error = str(exc)
+
+
+def _parse(record: Record) -> None:
+    if record.error is not None:
+        return
+    try:
+        record.data = json.loads(record.raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        record.error = str(exc)
+
+
+def read_record(path: Path) -> Record:
+    record = Record(path=path)
+    _read(record)
+    _parse(record)
+    return record
+
+
+def run_passes(passes: Sequence[CorpusPass], path: Path) -> List[Any]:
+    record = read_record(path)
+    return [corpus_pass.process(record) for corpus_pass in passes]
+
+
+def run_timed_passes(
+    passes: Sequence[CorpusPass], path: Path
+) -> Tuple[List[Any], List[Tuple[float, float]]]:
+    """
+    Like :func:`run_passes`, also returning (wall, CPU) times for reading,
+    parsing and each pass.
+    """
+    record = Record(path=path)
+    timings = []
+    steps = [lambda: _read(record), lambda: _parse(record)]
+    steps.extend(
+        lambda corpus_pass=corpus_pass: corpus_pass.process(record)
+        for corpus_pass in passes
+    )
+
+    results = []
+    for index, step in enumerate(steps):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = step()
+        timings.append((time.perf_counter() - wall, time.process_time() - cpu))
+        if index >= 2:
+            results.append(result)
+    return results, timings
+
+
+_worker_passes: Sequence[CorpusPass] = ()
+_worker_timed = False
+
+
+def _init_worker(passes: Sequence[CorpusPass], timed: bool) -> None:
+    global _worker_passes, _worker_timed
+    _worker_passes = passes
+    _worker_timed = timed
+
+
+def _run_worker_passes(path: Path) -> Any:
+    if _worker_timed:
+        return run_timed_passes(_worker_passes, path)
+    return run_passes(_worker_passes, path)
+
+
+def scan_corpus(
+    paths: Sequence[Path],
+    passes: Sequence[CorpusPass],
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> int:
+    """
+    Run ``passes`` over ``paths`` reading every file once.
+
+    Args:
+        paths: Entry files to scan, in the order results should be collected
+        passes: Passes to run on each parsed entry, in order
+        workers: Worker processes to use (default: CPU count, 1 runs inline)
+        chunksize: Number of files handed to a worker at a time
+
+    Returns:
+        The highest exit status reported by any pass
+
+    When instrumentation is enabled, time spent reading, parsing and in each
+    pass is reported as ``scan.read``, ``scan.parse`` and ``scan.<pass>``
+    (summed over workers), and parent-side work as ``collect.<pass>`` and
+    ``finish.<pass>``. cProfile and tracemalloc only see the parent process,
+    so the scan runs inline when either is enabled.
+    """
+    timed = instrument.enabled()
+    for corpus_pass in passes:
+        corpus_pass.begin()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if instrument.profiling() and workers > 1:
+        print(
+            "Note: scanning in a single process so cProfile/tracemalloc see "
+            "all of the work.",
+            file=sys.stderr,
+        )
+        workers = 1
+
+    with instrument.phase("scan"):
+        if workers <= 1 or len(paths) <= chunksize:
+            for path in paths:
+                if timed:
+                    _collect_timed(passes, path, run_timed_passes(passes, path))
+                else:
+                    _collect(passes, path, run_passes(passes, path))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(tuple(passes), timed),
+            ) as executor:
+                results = executor.map(_run_worker_passes, paths, chunksize=chunksize)
+                for path, result in zip(paths, results):
+                    if timed:
+                        _collect_timed(passes, path, result)
+                    else:
+                        _collect(passes, path, result)
+
+    status = 0
+    for corpus_pass in passes:
+        with instrument.phase(f"finish.{corpus_pass.name}"):
+            status = max(status, corpus_pass.finish())
+    return status
+
+
+def _collect(passes: Sequence[CorpusPass], path: Path, results: List[Any]) -> None:
+    for corpus_pass, result in zip(passes, results):
+        corpus_pass.collect(path, result)
+
+
+def _collect_timed(
+    passes: Sequence[CorpusPass],
+    path: Path,
+    scanned: Tuple[List[Any], List[Tuple[float, float]]],
+) -> None:
+    results, timings = scanned
+    instrument.record("scan.read", *timings[0])
+    instrument.record("scan.parse", *timings[1])
+    for corpus_pass, result, (wall, cpu) in zip(passes, results, timings[2:]):
+        instrument.record(f"scan.{corpus_pass.name}", wall, cpu)
+        with instrument.phase(f"collect.{corpus_pass.name}"):
+            corpus_pass.collect(path, result)
+
+
+def write_json(path: Path, value: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(value, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+
+
+class StatsPass(CorpusPass):
+    """Count entries, definitions, comparisons and part-of-speech usage."""
+
+    name = "stats"
+
+    def __init__(self, output: Optional[Path] = None) -> None:
+        self.output = output
+
+    def begin(self) -> None:
+        self._entries = 0
+        self._bytes = 0
+        self._definitions = 0
+        self._comparisons = 0
+        self._pos: Counter[str] = Counter()
+        self._forms: Counter[str] = Counter()
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None or not isinstance(record.data, dict):
+            return None
+
+        data = record.data
+        definitions = data.get("definitions")
+        comparison = data.get("comparison")
+        forms = data.get("forms")
+        definitions = definitions if isinstance(definitions, list) else []
+        return (
+            len(record.raw),
+            len(definitions),
+            len(comparison) if isinstance(comparison, list) else 0,
+            [
+                item.get("pos")
+                for item in definitions
+                if isinstance(item, dict) and isinstance(item.get("pos"), str)
+            ],
+            list(forms.keys()) if isinstance(forms, dict) else [],
+        )
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is None:
+            return
+        size, definitions, comparisons, pos_values, form_keys = result
+        self._entries += 1
+        self._bytes += size
+        self._definitions += definitions
+        self._comparisons += comparisons
+        self._pos.update(pos_values)
+        self._forms.update(form_keys)
+
+    def finish(self) -> int:
+        stats = {
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "definitions": self._definitions,
+            "comparisons": self._comparisons,
+            "pos": dict(self._pos.most_common()),
+            "forms": dict(self._forms.most_common()),
+        }
+        print(
+            f"Stats: {self._entries} entries, {self._bytes / 1024 / 1024:.2f} MB, "
+            f"{self._definitions} definitions, {self._comparisons} comparisons."
+        )
+        if self.output is not None:
+            write_json(self.output, stats)
+            print(f"Wrote stats to {self.output}")
+        return 0
+
+
+def build_template(value: Any) -> Any:
+    """Reduce an entry to its structure, keeping every key that appears."""
+    if isinstance(value, dict):
+        return {key: build_template(item) for key, item in value.items()}
+    if isinstance(value, list):
+        merged = None
+        for item in value:
+            merged = merge_templates(merged, build_template(item))
+        return [] if merged is None else [merged]
+    if isinstance(value, str):
+        return ""
+    return value
+
+
+def merge_templates(left: Any, right: Any) -> Any:
+    if left is None:
+        return right
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, item in right.items():
+            merged[key] = merge_templates(merged.get(key), item)
+        return merged
+    if isinstance(left, list) and isinstance(right, list):
+        if not left:
+            return right
+        if not right:
+            return left
+        return [merge_templates(left[0], right[0])]
+    return left
+
+
+class TemplatePass(CorpusPass):
+    """Derive a template containing every field seen across the corpus."""
+
+    name = "template"
+
+    def __init__(self, output: Optional[Path] = None) -> None:
+        self.output = output
+
+    def begin(self) -> None:
+        self._template: Any = None
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None:
+            return None
+        return build_template(record.data)
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is not None:
+            self._template = merge_templates(self._template, result)
+
+    def finish(self) -> int:
+        template = self._template if self._template is not None else {}
+        if self.output is None:
+            print(json.dumps(template, ensure_ascii=False, indent=2))
+        else:
+            write_json(self.output, template)
+            print(f"Wrote field template to {self.output}")
+        return 0
+
+
+class IndexPass(CorpusPass):
+    """Build a lookup index from file name to headword and concise definition."""
+
+    name = "index"
+
+    def __init__(self, output: Path) -> None:
+        self.output = output
+
+    def begin(self) -> None:
+        self._index: Dict[str, Dict[str, str]] = {}
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None or not isinstance(record.data, dict):
+            return None
+        return (
+            record.data.get("word") or record.path.stem,
+            record.data.get("concise_definition") or "",
+        )
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is None:
+            return
+        word, concise_definition = result
+        self._index[path.stem] = {
+            "word": word,
+            "concise_definition": concise_definition,
+        }
+
+    def finish(self) -> int:
+        write_json(self.output, self._index)
+        print(f"Wrote index of {len(self._index)} entries to {self.output}")
+        return 0
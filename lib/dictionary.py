@@ -0,0 +1,304 @@
+"""
+Compact in-memory dictionary.
+
+Entries are held in ``__slots__`` records instead of nested dicts. Keys, form
+names, part-of-speech values and compared words are interned so that each
+distinct string is stored once for the whole dictionary. The remaining text
+of definitions and comparisons is kept as a zlib-compressed UTF-8 blob per
+entry and only decoded when it is accessed.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from lib.corpus import iter_dictionary_files
+from lib.zstd_pack import ZstdPackReader, is_zstd_pack
+
+_intern = sys.intern
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _without(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    return {name: value for name, value in data.items() if name != key}
+
+
+class Definition:
+    __slots__ = ("pos", "explanation_en", "explanation_cn", "example_en", "example_cn")
+
+    def __init__(
+        self,
+        pos: str = "",
+        explanation_en: str = "",
+        explanation_cn: str = "",
+        example_en: str = "",
+        example_cn: str = "",
+    ) -> None:
+        self.pos = pos
+        self.explanation_en = explanation_en
+        self.explanation_cn = explanation_cn
+        self.example_en = example_en
+        self.example_cn = example_cn
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], pos: Optional[str] = None) -> "Definition":
+        if pos is None:
+            pos = _text(data.get("pos"))
+        return cls(pos, *(_text(data.get(key)) for key in cls.__slots__[1:]))
+
+    def to_dict(self) -> Dict[str, str]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Definition(pos={self.pos!r}, explanation_en={self.explanation_en!r})"
+
+
+class Comparison:
+    __slots__ = ("word_to_compare", "analysis")
+
+    def __init__(self, word_to_compare: str = "", analysis: str = "") -> None:
+        self.word_to_compare = word_to_compare
+        self.analysis = analysis
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Any], word_to_compare: Optional[str] = None
+    ) -> "Comparison":
+        if word_to_compare is None:
+            word_to_compare = _text(data.get("word_to_compare"))
+        return cls(word_to_compare, _text(data.get("analysis")))
+
+    def to_dict(self) -> Dict[str, str]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Comparison(word_to_compare={self.word_to_compare!r})"
+
+
+class Entry:
+    """
+    One dictionary entry.
+
+    ``definitions`` and ``comparison`` are decoded from the compressed blob on
+    every access and are not cached, so resident memory does not grow as
+    entries are looked up. Their ``pos`` and ``word_to_compare`` values are
+    kept outside the blob as interned tuples. Fields outside the schema in
+    ``lib/query.py`` are not kept.
+    """
+
+    __slots__ = (
+        "word",
+        "pronunciation",
+        "concise_definition",
+        "_forms",
+        "_pos",
+        "_compared",
+        "_payload",
+    )
+
+    def __init__(
+        self,
+        word: str,
+        pronunciation: str,
+        concise_definition: str,
+        forms: Tuple[Tuple[str, Any], ...],
+        pos: Tuple[str, ...],
+        compared: Tuple[str, ...],
+        payload: bytes,
+    ) -> None:
+        self.word = _intern(word)
+        self.pronunciation = pronunciation
+        self.concise_definition = concise_definition
+        self._forms = forms
+        self._pos = pos
+        self._compared = compared
+        self._payload = payload
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Entry":
+        forms = data.get("forms")
+        if not isinstance(forms, dict):
+            forms = {}
+        definitions, comparison = (
+            [item for item in items if isinstance(item, dict)]
+            if isinstance(items := data.get(key), list)
+            else []
+            for key in ("definitions", "comparison")
+        )
+        payload = [
+            [_without(item, "pos") for item in definitions],
+            [_without(item, "word_to_compare") for item in comparison],
+        ]
+        return cls(
+            _text(data.get("word")),
+            _text(data.get("pronunciation")),
+            _text(data.get("concise_definition")),
+            tuple(
+                (_intern(key), tuple(value) if isinstance(value, list) else value)
+                for key, value in forms.items()
+            ),
+            tuple(_intern(_text(item.get("pos"))) for item in definitions),
+            tuple(_intern(_text(item.get("word_to_compare"))) for item in comparison),
+            zlib.compress(
+                json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+                    "utf-8"
+                )
+            ),
+        )
+
+    @property
+    def forms(self) -> Dict[str, Any]:
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in self._forms
+        }
+
+    def _decode(self) -> List[List[Dict[str, Any]]]:
+        return json.loads(zlib.decompress(self._payload).decode("utf-8"))
+
+    def _definitions(self, items: List[Dict[str, Any]]) -> List[Definition]:
+        return [Definition.from_dict(item, pos) for item, pos in zip(items, self._pos)]
+
+    def _comparison(self, items: List[Dict[str, Any]]) -> List[Comparison]:
+        return [
+            Comparison.from_dict(item, word)
+            for item, word in zip(items, self._compared)
+        ]
+
+    @property
+    def definitions(self) -> List[Definition]:
+        return self._definitions(self._decode()[0])
+
+    @property
+    def comparison(self) -> List[Comparison]:
+        return self._comparison(self._decode()[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        definitions, comparison = self._decode()
+        return {
+            "word": self.word,
+            "pronunciation": self.pronunciation,
+            "concise_definition": self.concise_definition,
+            "forms": self.forms,
+            "definitions": [item.to_dict() for item in self._definitions(definitions)],
+            "comparison": [item.to_dict() for item in self._comparison(comparison)],
+        }
+
+    def __repr__(self) -> str:
+        return f"Entry(word={self.word!r})"
+
+
+class Dictionary:
+    """
+    Read-only mapping from lookup key (the entry's file name without
+    ``.json``) to :class:`Entry`.
+
+    Load it with :meth:`load`, which accepts the ``dictionary/`` directory or
+    an archive written by ``pack_dictionary.py`` (zip, tar or zstd).
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries: Optional[Dict[str, Entry]] = None) -> None:
+        self._entries: Dict[str, Entry] = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Dictionary":
+        path = Path(path)
+        dictionary = cls()
+        for key, raw in _iter_source(path):
+            try:
+                data = json.loads(raw.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict):
+                dictionary.add(key, data)
+        return dictionary
+
+    def add(self, key: str, data: Dict[str, Any]) -> Entry:
+        entry = Entry.from_dict(data)
+        self._entries[_intern(key)] = entry
+        return entry
+
+    def get(self, key: str, default: Optional[Entry] = None) -> Optional[Entry]:
+        return self._entries.get(key, default)
+
+    def __getitem__(self, key: str) -> Entry:
+        return self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def memory_footprint(self) -> int:
+        """
+        Return the approximate number of bytes held by the dictionary.
+
+        Every object reachable from the dictionary is counted once, so
+        interned strings shared between entries are only counted a single
+        time.
+        """
+        seen: set[int] = set()
+        total = 0
+        stack: List[Any] = [self._entries]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple)):
+                stack.extend(obj)
+            elif hasattr(obj, "__slots__"):
+                stack.extend(getattr(obj, name) for name in obj.__slots__)
+        return total
+
+
+def _iter_source(path: Path) -> Iterator[Tuple[str, bytes]]:
+    if path.is_dir():
+        for json_path in iter_dictionary_files(path):
+            yield json_path.stem, json_path.read_bytes()
+    elif is_zstd_pack(path):
+        with ZstdPackReader(path) as reader:
+            for key in reader:
+                yield key, reader.get_bytes(key)
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    yield Path(name).stem, archive.read(name)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.endswith(".json"):
+                    continue
+                handle = archive.extractfile(member)
+                if handle is not None:
+                    yield Path(member.name).stem, handle.read()
+    else:
+        raise ValueError(f"Unsupported dictionary source: {path}")
+
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("dictionary")
+    loaded = Dictionary.load(source)
+    print(
+        f"Loaded {len(loaded)} entries from {source}, "
+        f"{loaded.memory_footprint() / 1024 / 1024:.2f} MB resident."
+    )
@@ -0,0 +1,128 @@
+"""
+Frequency-ordered generation queue with an optional time or token budget.
+
+Pending words are popped most frequent first (wordfreq), so a run that is
+cut short by its budget has still covered the most useful words.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from wordfreq import word_frequency
+
+from lib.corpus import write_json
+
+
+class GenerationQueue:
+    """Max-priority queue of words keyed by wordfreq frequency."""
+
+    def __init__(self, words: Iterable[str], lang: str = "en") -> None:
+        # Ties keep their words.txt order.
+        self._heap: List[Tuple[float, int, str]] = [
+            (-word_frequency(word, lang), index, word)
+            for index, word in enumerate(words)
+        ]
+        heapq.heapify(self._heap)
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[2]
+
+    def remaining(self) -> List[str]:
+        return [word for _, _, word in sorted(self._heap)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+
+class Budget:
+    """
+    Time and/or token limit for a generation run.
+
+    Once the budget is exhausted, queued submissions are cancelled, workers
+    skip words they have not started and stop retrying; only requests
+    already sent are allowed to finish, so a run overshoots by at most
+    ``--workers`` requests. ``spend`` is called from worker threads after
+    every attempt, including ones that are retried.
+    """
+
+    def __init__(
+        self, seconds: Optional[float] = None, tokens: Optional[int] = None
+    ) -> None:
+        self.seconds = seconds
+        self.tokens = tokens
+        self.tokens_used = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed)
+
+    def spend(self, tokens: int) -> None:
+        with self._lock:
+            self.tokens_used += tokens
+
+    def exhausted_reason(self) -> Optional[str]:
+        if self.seconds is not None and self.elapsed >= self.seconds:
+            return f"time budget of {self.seconds:g}s reached"
+        if self.tokens is not None and self.tokens_used >= self.tokens:
+            return f"token budget of {self.tokens} reached"
+        return None
+
+
+def coverage_report(
+    words: List[str],
+    dict_dir: Path,
+    budget: Budget,
+    generated: int,
+    failed: List[str],
+    not_attempted: List[str],
+    stop_reason: Optional[str],
+    lang: str = "en",
+) -> Dict[str, Any]:
+    """
+    Summarize how much of ``words`` has an entry in ``dict_dir``.
+
+    ``frequency_coverage`` weights each word by its wordfreq frequency, which
+    is what the queue ordering maximizes.
+    """
+    frequencies = {word: word_frequency(word, lang) for word in words}
+    exists = {word: (dict_dir / f"{word}.json").exists() for word in words}
+    existing = [word for word in words if exists[word]]
+    missing = [word for word in words if not exists[word]]
+    total_frequency = sum(frequencies.values())
+    missing.sort(key=lambda word: -frequencies[word])
+    return {
+        "stop_reason": stop_reason or "all words processed",
+        "elapsed_seconds": round(budget.elapsed, 3),
+        "tokens_used": budget.tokens_used,
+        "generated": generated,
+        "failed": len(failed),
+        "not_attempted": len(not_attempted),
+        "words": len(words),
+        "covered": len(existing),
+        "coverage": len(existing) / len(words) if words else 1.0,
+        "frequency_coverage": (
+            sum(frequencies[word] for word in existing) / total_frequency
+            if total_frequency
+            else 1.0
+        ),
+        "top_missing": missing[:20],
+        "failed_words": failed,
+    }
+
+
+def write_coverage_report(path: Path, report: Dict[str, Any]) -> None:
+    write_json(path, report)
@@ -0,0 +1,324 @@
+"""
+Cross-reference graph built from each entry's ``comparison[].word_to_compare``.
+
+Words are numbered in sorted order and both directions of the graph are
+stored as CSR arrays: ``offsets[i]:offsets[i + 1]`` slices ``targets`` to
+give the neighbours of word ``i``. Compared words that have no entry in
+``dictionary/`` are kept as nodes and flagged as missing so they can be
+queued for generation.
+
+File layout (integers are little-endian)::
+
+    magic           8 bytes   b"OEDGRPH1"
+    word count      u32
+    edge count      u32
+    words size      u64
+    words           sorted words, UTF-8, separated by b"\\n"
+    present         one byte per word, 1 if the word has an entry
+    forward         offsets (word count + 1) u32, then targets (edge count) u32
+    reverse         offsets (word count + 1) u32, then targets (edge count) u32
+"""
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lib.build_words_list import is_generatable
+from lib.corpus import CorpusPass, Record
+
+MAGIC = b"OEDGRPH1"
+HEADER = struct.Struct("<8sIIQ")
+
+
+def normalize_word(word: str) -> str:
+    """Match the lookup key used for ``dictionary/<word>.json``."""
+    return word.strip().lower()
+
+
+def _u32(values: Iterable[int] = ()) -> array:
+    result = array("I", values)
+    if result.itemsize != 4:
+        result = array("L", values)
+    return result
+
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder == "little":
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _from_le(data: bytes) -> array:
+    values = _u32()
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _csr(count: int, edges: Sequence[Tuple[int, int]]) -> Tuple[array, array]:
+    offsets = _u32([0] * (count + 1))
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for index in range(count):
+        offsets[index + 1] += offsets[index]
+
+    targets = _u32([0] * len(edges))
+    cursor = _u32(offsets[:-1])
+    for source, target in edges:
+        targets[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, targets
+
+
+class ComparisonGraph:
+    """Forward and reverse comparison adjacency over all referenced words."""
+
+    def __init__(
+        self,
+        words: List[str],
+        present: bytes,
+        forward: Tuple[array, array],
+        reverse: Tuple[array, array],
+    ) -> None:
+        self.words = words
+        self._present = present
+        self._forward = forward
+        self._reverse = reverse
+        self._ids: Dict[str, int] = {word: index for index, word in enumerate(words)}
+
+    @classmethod
+    def build(cls, adjacency: Dict[str, Iterable[str]]) -> "ComparisonGraph":
+        """
+        Build the graph from ``{entry key: compared words}``.
+
+        Every key of ``adjacency`` is treated as an existing entry; compared
+        words are normalized, and self references and duplicates are dropped.
+        """
+        edges_by_word = {
+            normalize_word(word): sorted(
+                {normalize_word(target) for target in targets} - {normalize_word(word), ""}
+            )
+            for word, targets in adjacency.items()
+        }
+        words = sorted(set(edges_by_word).union(*edges_by_word.values()) - {""})
+        ids = {word: index for index, word in enumerate(words)}
+        present = bytes(1 if word in edges_by_word else 0 for word in words)
+
+        edges = [
+            (ids[word], ids[target])
+            for word in words
+            for target in edges_by_word.get(word, ())
+        ]
+        forward = _csr(len(words), edges)
+        reverse = _csr(len(words), sorted((target, source) for source, target in edges))
+        return cls(words, present, forward, reverse)
+
+    @classmethod
+    def load(cls, path: Path) -> "ComparisonGraph":
+        data = Path(path).read_bytes()
+        magic, count, edge_count, words_size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a comparison graph file: {path}")
+
+        cursor = HEADER.size
+        words = data[cursor : cursor + words_size].decode("utf-8").split("\n")
+        if not count:
+            words = []
+        cursor += words_size
+        present = data[cursor : cursor + count]
+        cursor += count
+
+        arrays = []
+        for size in (count + 1, edge_count, count + 1, edge_count):
+            arrays.append(_from_le(data[cursor : cursor + size * 4]))
+            cursor += size * 4
+        return cls(words, present, (arrays[0], arrays[1]), (arrays[2], arrays[3]))
+
+    def save(self, path: Path) -> Path:
+        words = "\n".join(self.words).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(
+                HEADER.pack(MAGIC, len(self.words), len(self._forward[1]), len(words))
+            )
+            handle.write(words)
+            handle.write(self._present)
+            for values in (*self._forward, *self._reverse):
+                handle.write(_to_le(values))
+        return path
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and normalize_word(word) in self._ids
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._forward[1])
+
+    def in_dictionary(self, word: str) -> bool:
+        index = self._ids.get(normalize_word(word))
+        return index is not None and bool(self._present[index])
+
+    def _adjacent(self, csr: Tuple[array, array], index: int) -> List[int]:
+        offsets, targets = csr
+        return list(targets[offsets[index] : offsets[index + 1]])
+
+    def neighbors(self, word: str) -> List[str]:
+        """Words that ``word``'s entry compares itself to."""
+        index = self._ids.get(normalize_word(word))
+        if index is None:
+            return []
+        return [self.words[target] for target in self._adjacent(self._forward, index)]
+
+    def referrers(self, word: str) -> List[str]:
+        """Entries that compare themselves to ``word``."""
+        index = self._ids.get(normalize_word(word))
+        if index is None:
+            return []
+        return [self.words[source] for source in self._adjacent(self._reverse, index)]
+
+    def related(
+        self, word: str, hops: int = 2, direction: str = "both"
+    ) -> Dict[str, int]:
+        """
+        Return words reachable from ``word`` within ``hops`` steps.
+
+        Args:
+            word: Starting word
+            hops: Maximum number of edges to follow
+            direction: "forward", "reverse" or "both"
+
+        Returns:
+            Mapping of related word to hop distance, nearest first
+        """
+        if direction not in {"forward", "reverse", "both"}:
+            raise ValueError(f"Unknown direction: {direction}")
+
+        start = self._ids.get(normalize_word(word))
+        if start is None:
+            return {}
+
+        graphs = []
+        if direction in {"forward", "both"}:
+            graphs.append(self._forward)
+        if direction in {"reverse", "both"}:
+            graphs.append(self._reverse)
+
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            if distances[index] >= hops:
+                continue
+            for csr in graphs:
+                for target in self._adjacent(csr, index):
+                    if target not in distances:
+                        distances[target] = distances[index] + 1
+                        queue.append(target)
+
+        del distances[start]
+        return {self.words[index]: distance for index, distance in distances.items()}
+
+    def missing(self, generatable: Optional[bool] = True) -> List[str]:
+        """
+        Compared words without an entry, most referenced first.
+
+        By default only words that ``main.py`` can generate (the
+        ``words.txt`` filter) are returned; pass ``generatable=False`` for
+        the rest, such as phrases and annotated forms, or ``None`` for all.
+        """
+        offsets = self._reverse[0]
+        missing = [
+            index
+            for index, flag in enumerate(self._present)
+            if not flag
+            and (generatable is None or is_generatable(self.words[index]) == generatable)
+        ]
+        missing.sort(
+            key=lambda index: (offsets[index] - offsets[index + 1], self.words[index])
+        )
+        return [self.words[index] for index in missing]
+
+
+class GraphPass(CorpusPass):
+    """
+    Collect comparison links and write the graph and missing-word lists.
+
+    ``missing_output`` only lists words that can be queued for generation;
+    other compared words without an entry go to ``ungeneratable_output``.
+    """
+
+    name = "graph"
+
+    def __init__(
+        self,
+        output: Path,
+        missing_output: Optional[Path] = None,
+        ungeneratable_output: Optional[Path] = None,
+    ) -> None:
+        self.output = output
+        self.missing_output = missing_output
+        self.ungeneratable_output = ungeneratable_output
+
+    def begin(self) -> None:
+        self._adjacency: Dict[str, List[str]] = {}
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None or not isinstance(record.data, dict):
+            return None
+        comparison = record.data.get("comparison")
+        if not isinstance(comparison, list):
+            return []
+        return [
+            item["word_to_compare"]
+            for item in comparison
+            if isinstance(item, dict) and isinstance(item.get("word_to_compare"), str)
+        ]
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is not None:
+            self._adjacency[path.stem] = result
+
+    def finish(self) -> int:
+        graph = ComparisonGraph.build(self._adjacency)
+        graph.save(self.output)
+        missing = graph.missing()
+        ungeneratable = graph.missing(generatable=False)
+        print(
+            f"Wrote comparison graph of {len(graph)} words and {graph.edge_count} "
+            f"links to {self.output}; {len(missing)} compared words have no entry "
+            f"and can be generated, {len(ungeneratable)} more cannot."
+        )
+        for path, words, label in (
+            (self.missing_output, missing, "missing compared words"),
+            (self.ungeneratable_output, ungeneratable, "ungeneratable compared words"),
+        ):
+            if path is None:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("\n".join(words), encoding="utf-8")
+            print(f"Wrote {label} to {path}")
+        return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m lib.graph <graph file> <word> [hops]", file=sys.stderr)
+        sys.exit(1)
+    loaded = ComparisonGraph.load(Path(sys.argv[1]))
+    query = sys.argv[2]
+    print(f"Compares itself to: {', '.join(loaded.neighbors(query)) or '-'}")
+    print(f"Compared from: {', '.join(loaded.referrers(query)) or '-'}")
+    hop_limit = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    for related_word, distance in loaded.related(query, hops=hop_limit).items():
+        marker = "" if loaded.in_dictionary(related_word) else " (missing)"
+        print(f"  {distance} {related_word}{marker}")
@@ -0,0 +1,262 @@
+"""
+Timing, profiling and memory instrumentation shared by the CLI entry points.
+
+Every script exposes the same flags through :func:`add_arguments`:
+
+    --instrument REPORT.json   per-phase timers and peak RSS as one JSON report
+    --cprofile OUT.prof        also dump cProfile stats of the main thread and
+                               of blocks wrapped in :func:`profile_thread`
+    --tracemalloc              also record peak traced memory and top allocations
+
+Code marks its phases with :func:`phase`, which is a no-op unless a run is
+instrumented. Phases measured inside corpus workers are summed across
+processes, so their wall and CPU time can exceed the elapsed time of the
+run. cProfile and tracemalloc only cover the parent process, so the corpus
+scanner runs inline while either is enabled.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACEMALLOC_TOP = 25
+
+_active: Optional["Instrumentation"] = None
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        command: str,
+        report: Optional[Path] = None,
+        cprofile: Optional[Path] = None,
+        trace_memory: bool = False,
+    ) -> None:
+        self.command = command
+        self.report = report
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._thread_profilers: List[cProfile.Profile] = []
+        self._thread_local = threading.local()
+
+    def add(
+        self,
+        name: str,
+        wall: float,
+        cpu: Optional[float] = None,
+        calls: int = 1,
+    ) -> None:
+        with self._lock:
+            stats = self.phases.setdefault(name, {"calls": 0, "wall_seconds": 0.0})
+            stats["calls"] += calls
+            stats["wall_seconds"] += wall
+            if cpu is not None:
+                stats["cpu_seconds"] = stats.get("cpu_seconds", 0.0) + cpu
+
+    @contextmanager
+    def profile_thread(self) -> Iterator[None]:
+        if self._profiler is None:
+            yield
+            return
+
+        profiler = getattr(self._thread_local, "profiler", None)
+        if profiler is None:
+            profiler = cProfile.Profile()
+            self._thread_local.profiler = profiler
+            with self._lock:
+                self._thread_profilers.append(profiler)
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread through sys.monitoring and
+            # allows one profiler at a time; the main one already sees this.
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def __enter__(self) -> "Instrumentation":
+        global _active
+        _active = self
+        self._started_at = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        global _active
+        # Stop tracing first so the profile dump below is not counted.
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if self._profiler is not None:
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler)
+            for profiler in self._thread_profilers:
+                profiler.create_stats()
+                if profiler.stats:
+                    stats.add(profiler)
+            self.cprofile.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(self.cprofile)
+
+        report: Dict[str, Any] = {
+            "command": self.command,
+            "argv": sys.argv,
+            "started_at": self._started_at.isoformat(),
+            "wall_seconds": time.perf_counter() - self._wall,
+            "cpu_seconds": time.process_time() - self._cpu,
+            "phases": dict(sorted(self.phases.items())),
+            "peak_rss_bytes": peak_rss(),
+        }
+        if self.trace_memory:
+            report["tracemalloc"] = {
+                "peak_bytes": peak,
+                "top": [
+                    {
+                        "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "size_bytes": stat.size,
+                        "count": stat.count,
+                    }
+                    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                ],
+            }
+        if self.cprofile is not None:
+            report["cprofile"] = str(self.cprofile)
+
+        text = json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+        if self.report is None:
+            sys.stderr.write(text)
+        else:
+            self.report.parent.mkdir(parents=True, exist_ok=True)
+            self.report.write_text(text, encoding="utf-8")
+            print(f"Wrote instrumentation report to {self.report}", file=sys.stderr)
+        _active = None
+
+
+def peak_rss() -> Dict[str, Optional[int]]:
+    """Peak resident set size of this process and of its reaped children."""
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def profiling() -> bool:
+    """Whether cProfile or tracemalloc is recording the current run."""
+    return _active is not None and (
+        _active.cprofile is not None or _active.trace_memory
+    )
+
+
+def record(name: str, wall: float, cpu: Optional[float] = None, calls: int = 1) -> None:
+    """Add an externally measured duration to phase ``name``."""
+    if _active is not None:
+        _active.add(name, wall, cpu, calls)
+
+
+def profile_thread() -> ContextManager[Any]:
+    """
+    Include the enclosed block in ``--cprofile`` output when it runs on a
+    worker thread, which the main thread's profiler may not see.
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.profile_thread()
+
+
+@contextmanager
+def phase(name: str, cpu: bool = True) -> Iterator[None]:
+    """
+    Time the enclosed block as phase ``name``.
+
+    Pass ``cpu=False`` for blocks that run on worker threads, where process
+    CPU time would include the other threads.
+    """
+    if _active is None:
+        yield
+        return
+
+    wall = time.perf_counter()
+    cpu_start = time.process_time() if cpu else None
+    try:
+        yield
+    finally:
+        _active.add(
+            name,
+            time.perf_counter() - wall,
+            None if cpu_start is None else time.process_time() - cpu_start,
+        )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument(
+        "--instrument",
+        type=Path,
+        metavar="REPORT",
+        default=None,
+        help="Write per-phase timings and peak RSS to this JSON report.",
+    )
+    group.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="OUTPUT",
+        default=None,
+        help="Dump cProfile stats of the main thread and worker calls to this file.",
+    )
+    group.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Record peak traced memory and the top allocation sites.",
+    )
+
+
+def from_args(args: argparse.Namespace, command: str) -> ContextManager[Any]:
+    """
+    Build the instrumentation requested on the command line.
+
+    Returns a no-op context manager when no instrumentation flag was given;
+    without ``--instrument`` the report is written to stderr.
+    """
+    if args.instrument is None and args.cprofile is None and not args.tracemalloc:
+        return nullcontext()
+    return Instrumentation(
+        command,
+        report=args.instrument,
+        cprofile=args.cprofile,
+        trace_memory=args.tracemalloc,
+    )
@@ -130,11 +130,16 @@ develop
 """
 
 def get_definition(word: str) -> str:
+  return get_definition_with_usage(word)[0]
+
+def get_definition_with_usage(word: str) -> tuple[str, int]:
+  """Return the generated JSON and the total tokens billed for the request."""
   resp = client.responses.create(
     model=api_model, # type: ignore
     instructions=system_instructions,
     input=word,
     temperature=0.1
   )
-  
-  return resp.output_text
+
+  tokens = resp.usage.total_tokens if resp.usage else 0
+  return resp.output_text, tokens
@@ -0,0 +1,200 @@
+"""
+Random-access dictionary file compressed with a trained zstd dictionary.
+
+Every entry repeats the same keys and much of the same phrasing, so a zstd
+dictionary trained on the corpus lets each entry be compressed on its own
+while still reaching a ratio close to compressing the corpus as a whole.
+Looking up one word decompresses one small frame.
+
+File layout (integers are little-endian)::
+
+    magic           8 bytes   b"OEDZSTD1"
+    entry count     u32
+    dictionary size u32
+    keys size       u64
+    dictionary      zstd dictionary trained on the entries
+    keys            sorted lookup keys, UTF-8, separated by b"\\n"
+    offsets         (entry count + 1) u64, frame offsets into the data section
+    data            one zstd frame per entry, in key order
+
+Requires the optional ``zstandard`` package (``uv sync --extra zstd``).
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+MAGIC = b"OEDZSTD1"
+SUFFIX = ".zdict"
+HEADER = struct.Struct("<8sIIQ")
+
+DEFAULT_DICT_SIZE = 112 * 1024
+DEFAULT_LEVEL = 19
+# Training on a few thousand entries is enough to learn the shared structure
+# and keeps training time well under the time spent compressing.
+MAX_TRAINING_SAMPLES = 8000
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ImportError(
+            "zstd dictionary files require the 'zstandard' package "
+            "(uv sync --extra zstd)"
+        ) from exc
+    return zstandard
+
+
+def is_zstd_pack(path: Path) -> bool:
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def minify_entry(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_zstd_pack(
+    path: Path,
+    entries: Iterable[Tuple[str, bytes]],
+    dict_size: int = DEFAULT_DICT_SIZE,
+    level: int = DEFAULT_LEVEL,
+) -> Path:
+    """
+    Train a zstd dictionary on ``entries`` and write them to ``path``.
+
+    Args:
+        path: Output file
+        entries: (lookup key, entry bytes) pairs; keys must be unique
+        dict_size: Size of the trained zstd dictionary in bytes
+        level: zstd compression level
+
+    Returns:
+        The written path
+    """
+    zstandard = _zstd()
+    entries = sorted(entries)
+    if not entries:
+        raise ValueError("No entries to pack.")
+
+    step = max(1, len(entries) // MAX_TRAINING_SAMPLES)
+    samples = [raw for _, raw in entries[::step]]
+    dictionary = zstandard.train_dictionary(dict_size, samples, level=level)
+    compressor = zstandard.ZstdCompressor(
+        level=level, dict_data=dictionary, write_checksum=False
+    )
+
+    keys = b"\n".join(key.encode("utf-8") for key, _ in entries)
+    offsets = array("Q", [0])
+    frames = []
+    for _, raw in entries:
+        frame = compressor.compress(raw)
+        frames.append(frame)
+        offsets.append(offsets[-1] + len(frame))
+    if offsets.itemsize != 8:
+        raise RuntimeError("array('Q') must be 64-bit to write offsets.")
+
+    dict_bytes = dictionary.as_bytes()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, len(entries), len(dict_bytes), len(keys)))
+        handle.write(dict_bytes)
+        handle.write(keys)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        handle.write(offsets.tobytes())
+        for frame in frames:
+            handle.write(frame)
+    return path
+
+
+class ZstdPackReader:
+    """
+    Memory-mapped reader for files written by :func:`write_zstd_pack`.
+
+    Only the key table and the offsets are decoded when the file is opened;
+    each lookup decompresses a single frame. zstd decompressors must not be
+    shared between threads, so each thread gets its own, all reusing the
+    same trained dictionary.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._zstandard = _zstd()
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, dict_size, keys_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a zstd dictionary file: {self.path}")
+
+        cursor = HEADER.size
+        self._dictionary = self._zstandard.ZstdCompressionDict(
+            self._map[cursor : cursor + dict_size]
+        )
+        cursor += dict_size
+        keys = self._map[cursor : cursor + keys_size].decode("utf-8").split("\n")
+        cursor += keys_size
+        self._offsets = array("Q")
+        self._offsets.frombytes(self._map[cursor : cursor + (count + 1) * 8])
+        if sys.byteorder != "little":
+            self._offsets.byteswap()
+        self._data_start = cursor + (count + 1) * 8
+
+        self._index: Dict[str, int] = {key: index for index, key in enumerate(keys)}
+        self._local = threading.local()
+
+    def _decompressor(self) -> Any:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._zstandard.ZstdDecompressor(dict_data=self._dictionary)
+            self._local.decompressor = decompressor
+        return decompressor
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        index = self._index.get(key)
+        if index is None:
+            return None
+        start = self._data_start + self._offsets[index]
+        end = self._data_start + self._offsets[index + 1]
+        return self._decompressor().decompress(self._map[start:end])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.get_bytes(key)
+        return None if raw is None else json.loads(raw.decode("utf-8"))
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        data = self.get(key)
+        if data is None:
+            raise KeyError(key)
+        return data
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ZstdPackReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
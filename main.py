@@ -1,30 +1,70 @@
+import argparse
 import json
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from lib import instrument
 from lib.build_words_list import build_words_list, read_words_list
-from lib.query import get_definition
+from lib.generation_queue import (
+    Budget,
+    GenerationQueue,
+    coverage_report,
+    write_coverage_report,
+)
+from lib.query import get_definition_with_usage
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate dictionary entries for words.txt')
+    parser.add_argument('--workers', type=int, default=50, help='Concurrent requests (default: 50)')
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help='Words submitted but not finished at any time (default: 2x workers)')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Stop submitting new words after this many seconds')
+    parser.add_argument('--token-budget', type=int, default=None,
+                        help='Stop submitting new words after this many tokens')
+    parser.add_argument('--coverage-report', type=Path, default=None,
+                        help='Write the end-of-run coverage report to this JSON file')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument.from_args(args, 'main'):
+        run(args)
+
+def run(args: argparse.Namespace):
     # Ensure we have the words list
-    build_words_list()
+    with instrument.phase('words.build'):
+        build_words_list()
 
     # Read the words list
-    words = read_words_list()
+    with instrument.phase('words.read'):
+        words = read_words_list()
 
     # Create dictionary directory
     dict_dir = Path('dictionary')
     dict_dir.mkdir(exist_ok=True)
 
-    # Process each word with retry logic
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
+    # Shared with the worker threads, which charge every attempt to it
+    budget = Budget(seconds=args.time_budget, tokens=args.token_budget)
+
+    def budget_exhausted(retry_state) -> bool:
+        return budget.exhausted_reason() is not None
+
+    # Process each word with retry logic, giving up early once the budget is spent
+    @retry(stop=stop_after_attempt(5) | budget_exhausted,
+           wait=wait_exponential(multiplier=1, min=2, max=10))
     def process_word(word: str) -> tuple[str, bool, str]:
-        definition_json = get_definition(word)
-        definition_data = json.loads(definition_json)
+        # Runs on worker threads, so only wall time is meaningful
+        with instrument.phase('generate.request', cpu=False):
+            definition_json, tokens = get_definition_with_usage(word)
+        # Count every attempt, including ones that fail to parse and are retried
+        budget.spend(tokens)
+        with instrument.phase('generate.parse', cpu=False):
+            definition_data = json.loads(definition_json)
 
         output_file = dict_dir / f'{word}.json'
-        output_file.write_text(json.dumps(definition_data, ensure_ascii=False, indent=2))
+        with instrument.phase('generate.write', cpu=False):
+            output_file.write_text(json.dumps(definition_data, ensure_ascii=False, indent=2))
         return word, True, ''
 
     # Worker function for parallel processing
@@ -35,34 +75,84 @@ def main():
         if output_file.exists():
             return word, True, 'already exists'
 
+        # A queued word can start after the budget ran out
+        if budget.exhausted_reason() is not None:
+            return word, False, 'not attempted'
+
         try:
-            return process_word(word)
+            with instrument.profile_thread():
+                return process_word(word)
         except Exception as e:
             return word, False, str(e)
 
     # Filter out already processed words
-    words_to_process = [w for w in words if not (dict_dir / f'{w}.json').exists()]
+    with instrument.phase('words.filter'):
+        words_to_process = [w for w in words if not (dict_dir / f'{w}.json').exists()]
     already_processed = len(words) - len(words_to_process)
     total = len(words)
 
     if already_processed > 0:
         print(f'Skipping {already_processed} already processed words')
 
-    # Process words in parallel with 30 workers
+    # Most frequent words first, with a bounded number of submissions in flight
+    queue = GenerationQueue(words_to_process)
+    max_in_flight = args.max_in_flight or 2 * args.workers
     completed = already_processed
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        futures = {executor.submit(process_word_wrapper, word): word for word in words_to_process}
-
-        for future in as_completed(futures):
-            word, success, message = future.result()
-            completed += 1
-
-            if message == 'already exists':
-                print(f'[{completed}/{total}] Skipping {word} (already exists)')
-            elif success:
-                print(f'[{completed}/{total}] {word}')
-            else:
-                print(f'[{completed}/{total}] {word} failed after 5 retries: {message}')
+    generated = 0
+    failed: list[str] = []
+    not_started: list[str] = []
+    stop_reason = None
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        in_flight = {}
+        while queue or in_flight:
+            if stop_reason is None:
+                stop_reason = budget.exhausted_reason()
+                if stop_reason is not None:
+                    # Drop submissions that have not started; running ones finish
+                    for future, word in list(in_flight.items()):
+                        if future.cancel():
+                            del in_flight[future]
+                            not_started.append(word)
+            while queue and len(in_flight) < max_in_flight and stop_reason is None:
+                word = queue.pop()
+                in_flight[executor.submit(process_word_wrapper, word)] = word
+            if not in_flight:
+                break
+
+            # Wake up at the time limit even if nothing has completed
+            timeout = budget.remaining_seconds() if stop_reason is None else None
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                del in_flight[future]
+                word, success, message = future.result()
+                if message == 'not attempted':
+                    not_started.append(word)
+                    continue
+                completed += 1
+
+                if message == 'already exists':
+                    print(f'[{completed}/{total}] Skipping {word} (already exists)')
+                elif success:
+                    generated += 1
+                    print(f'[{completed}/{total}] {word}')
+                else:
+                    failed.append(word)
+                    print(f'[{completed}/{total}] {word} failed: {message}')
+
+    # Words that never started were popped first, so they are the most frequent
+    not_attempted = not_started + queue.remaining()
+    if stop_reason is not None:
+        print(f'Stopped early: {stop_reason}, {len(not_attempted)} words not attempted')
+
+    report = coverage_report(words, dict_dir, budget, generated, failed, not_attempted, stop_reason)
+    print(
+        f"Coverage: {report['covered']}/{report['words']} words ({report['coverage']:.1%}), "
+        f"{report['frequency_coverage']:.1%} by frequency; "
+        f"{generated} generated, {len(failed)} failed, {budget.tokens_used} tokens, "
+        f"{report['elapsed_seconds']:.0f}s"
+    )
+    if args.coverage_report is not None:
+        write_coverage_report(args.coverage_report, report)
 
 if __name__ == '__main__':
     main()
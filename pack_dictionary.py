@@ -1,13 +1,178 @@
 #!/usr/bin/env python3
 """
 Pack the dictionary directory into multiple archive formats.
-Supports: zip, tar.gz, tar.bz2, tar.xz
+Supports: zip, tar.gz, tar.bz2, tar.xz, and zstd (per-entry frames sharing a
+trained zstd dictionary, see lib/zstd_pack.py)
 """
 
 import argparse
-import shutil
 import sys
+import tarfile
+import time
+import zipfile
+from io import BytesIO
 from pathlib import Path
+from typing import Any, Optional
+
+from lib import instrument, zstd_pack
+from lib.corpus import CorpusPass, Record, iter_dictionary_files, scan_corpus
+
+
+ARCHIVE_SUFFIXES = {
+    "zip": ".zip",
+    "tar.gz": ".tar.gz",
+    "tar.bz2": ".tar.bz2",
+    "tar.xz": ".tar.xz",
+    "zstd": zstd_pack.SUFFIX,
+}
+
+
+def archive_path(output_dir: Path, base_name: str, fmt: str, multiple: bool) -> Path:
+    """Name archives the way earlier releases did."""
+    path = output_dir / f"{base_name}{ARCHIVE_SUFFIXES[fmt]}"
+    if multiple:
+        path = output_dir / f"{base_name}-{fmt.replace('.', '-')}{path.suffix}"
+    return path
+
+
+class PackPass(CorpusPass):
+    """
+    Write every entry into one or more archives.
+
+    Workers hand back the bytes they already read, so packing does not read
+    the corpus a second time. Members are stored under ``arcname_root`` in
+    sorted order. The zstd format needs every entry before it can train its
+    dictionary, so its (minified) entries are kept until ``finish``. Entries
+    that failed an earlier validate pass are left out.
+    """
+
+    name = "pack"
+
+    def __init__(
+        self,
+        output_dir: Path,
+        formats: list[str],
+        base_name: str = "open-c2e-dictionary",
+        arcname_root: str = "dictionary",
+        zstd_dict_size: int = zstd_pack.DEFAULT_DICT_SIZE,
+        zstd_level: int = zstd_pack.DEFAULT_LEVEL,
+    ) -> None:
+        self.output_dir = output_dir
+        self.formats = formats
+        self.base_name = base_name
+        self.arcname_root = arcname_root
+        self.zstd_dict_size = zstd_dict_size
+        self.zstd_level = zstd_level
+
+    def begin(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.created_archives: list[Path] = []
+        self._archives: dict[str, tuple[Path, Any]] = {}
+        self._zstd_entries: Optional[list[tuple[str, bytes]]] = None
+
+        for fmt in self.formats:
+            if fmt not in ARCHIVE_SUFFIXES:
+                print(f"Warning: Unknown format '{fmt}', skipping", file=sys.stderr)
+                continue
+
+            path = archive_path(
+                self.output_dir, self.base_name, fmt, len(self.formats) > 1
+            )
+            print(f"Creating {fmt} archive...")
+            if fmt == "zstd":
+                self._zstd_path = path
+                self._zstd_entries = []
+                continue
+            try:
+                if fmt == "zip":
+                    archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+                    archive.writestr(f"{self.arcname_root}/", b"")
+                else:
+                    archive = tarfile.open(path, f"w:{fmt.split('.')[-1]}")
+                    info = tarfile.TarInfo(self.arcname_root)
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o755
+                    info.mtime = int(time.time())
+                    archive.addfile(info)
+            except Exception as e:
+                print(f"✗ Failed to create {fmt} archive: {e}", file=sys.stderr)
+                continue
+            self._archives[fmt] = (path, archive)
+
+    def process(self, record: Record) -> Any:
+        if not record.raw:
+            return None
+        if record.invalid:
+            return False
+        minified = None
+        if "zstd" in self.formats and record.error is None:
+            minified = zstd_pack.minify_entry(record.data)
+        return record.raw, record.path.stat().st_mtime, minified
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is None:
+            return
+        if result is False:
+            print(
+                f"Warning: {path} failed validation, leaving it out of the archives",
+                file=sys.stderr,
+            )
+            return
+
+        raw, mtime, minified = result
+        if self._zstd_entries is not None:
+            if minified is None:
+                print(
+                    f"Warning: {path} is not valid JSON, leaving it out of the zstd file",
+                    file=sys.stderr,
+                )
+            else:
+                self._zstd_entries.append((path.stem, minified))
+
+        arcname = f"{self.arcname_root}/{path.name}"
+        for fmt, (archive_file, archive) in list(self._archives.items()):
+            try:
+                if isinstance(archive, zipfile.ZipFile):
+                    info = zipfile.ZipInfo(arcname, time.localtime(mtime)[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.external_attr = 0o644 << 16
+                    archive.writestr(info, raw)
+                else:
+                    info = tarfile.TarInfo(arcname)
+                    info.size = len(raw)
+                    info.mode = 0o644
+                    info.mtime = int(mtime)
+                    archive.addfile(info, BytesIO(raw))
+            except Exception as e:
+                print(f"✗ Failed to create {fmt} archive: {e}", file=sys.stderr)
+                archive.close()
+                archive_file.unlink(missing_ok=True)
+                del self._archives[fmt]
+
+    def finish(self) -> int:
+        if self._zstd_entries is not None:
+            try:
+                zstd_pack.write_zstd_pack(
+                    self._zstd_path,
+                    self._zstd_entries,
+                    dict_size=self.zstd_dict_size,
+                    level=self.zstd_level,
+                )
+                self.created_archives.append(self._zstd_path)
+                print(f"✓ Created: {self._zstd_path} ({self._zstd_path.stat().st_size / 1024 / 1024:.2f} MB)")
+            except Exception as e:
+                print(f"✗ Failed to create zstd archive: {e}", file=sys.stderr)
+            self._zstd_entries = None
+
+        for fmt, (archive_file, archive) in self._archives.items():
+            try:
+                archive.close()
+            except Exception as e:
+                print(f"✗ Failed to create {fmt} archive: {e}", file=sys.stderr)
+                continue
+            self.created_archives.append(archive_file)
+            print(f"✓ Created: {archive_file} ({archive_file.stat().st_size / 1024 / 1024:.2f} MB)")
+        return 0 if self.created_archives else 1
 
 
 def pack_directory(
@@ -15,6 +180,9 @@ def pack_directory(
     output_dir: Path,
     formats: list[str],
     base_name: str = "open-c2e-dictionary",
+    workers: Optional[int] = None,
+    zstd_dict_size: int = zstd_pack.DEFAULT_DICT_SIZE,
+    zstd_level: int = zstd_pack.DEFAULT_LEVEL,
 ) -> list[Path]:
     """
     Pack the source directory into specified archive formats.
@@ -22,8 +190,11 @@ def pack_directory(
     Args:
         source_dir: Directory to pack
         output_dir: Directory to save archives
-        formats: List of archive formats (zip, tar.gz, tar.bz2, tar.xz)
+        formats: List of archive formats (zip, tar.gz, tar.bz2, tar.xz, zstd)
         base_name: Base name for output archives
+        workers: Worker processes used to read the corpus (default: CPU count)
+        zstd_dict_size: Size of the trained dictionary for the zstd format
+        zstd_level: Compression level for the zstd format
 
     Returns:
         List of created archive paths
@@ -31,48 +202,16 @@ def pack_directory(
     if not source_dir.exists():
         raise FileNotFoundError(f"Source directory not found: {source_dir}")
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    created_archives = []
-
-    format_mapping = {
-        "zip": "zip",
-        "tar.gz": "gztar",
-        "tar.bz2": "bztar",
-        "tar.xz": "xztar",
-    }
-
-    for fmt in formats:
-        if fmt not in format_mapping:
-            print(f"Warning: Unknown format '{fmt}', skipping", file=sys.stderr)
-            continue
-
-        archive_format = format_mapping[fmt]
-        output_base = output_dir / base_name
-
-        print(f"Creating {fmt} archive...")
-        try:
-            archive_path = shutil.make_archive(
-                str(output_base),
-                archive_format,
-                root_dir=source_dir.parent,
-                base_dir=source_dir.name,
-            )
-            created_path = Path(archive_path)
-
-            # Rename to include format in name if multiple formats
-            if len(formats) > 1:
-                final_path = output_dir / f"{base_name}-{fmt.replace('.', '-')}{created_path.suffix}"
-                if created_path != final_path:
-                    created_path.rename(final_path)
-                    created_path = final_path
-
-            created_archives.append(created_path)
-            print(f"✓ Created: {created_path} ({created_path.stat().st_size / 1024 / 1024:.2f} MB)")
-
-        except Exception as e:
-            print(f"✗ Failed to create {fmt} archive: {e}", file=sys.stderr)
-
-    return created_archives
+    pack = PackPass(
+        output_dir,
+        formats,
+        base_name,
+        arcname_root=source_dir.name,
+        zstd_dict_size=zstd_dict_size,
+        zstd_level=zstd_level,
+    )
+    scan_corpus(iter_dictionary_files(source_dir), [pack], workers=workers)
+    return pack.created_archives
 
 
 def main():
@@ -94,7 +233,7 @@ def main():
     parser.add_argument(
         "--formats",
         nargs="+",
-        choices=["zip", "tar.gz", "tar.bz2", "tar.xz"],
+        choices=list(ARCHIVE_SUFFIXES),
         default=["zip", "tar.gz"],
         help="Archive formats to create (default: zip tar.gz)",
     )
@@ -103,15 +242,42 @@ def main():
         default="open-c2e-dictionary",
         help="Base name for output archives (default: open-c2e-dictionary)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes used to read the corpus (default: CPU count)",
+    )
+    parser.add_argument(
+        "--zstd-dict-size",
+        type=int,
+        default=zstd_pack.DEFAULT_DICT_SIZE,
+        help=f"Trained dictionary size in bytes for the zstd format (default: {zstd_pack.DEFAULT_DICT_SIZE})",
+    )
+    parser.add_argument(
+        "--zstd-level",
+        type=int,
+        default=zstd_pack.DEFAULT_LEVEL,
+        help=f"Compression level for the zstd format (default: {zstd_pack.DEFAULT_LEVEL})",
+    )
 
+    instrument.add_arguments(parser)
     args = parser.parse_args()
 
+    with instrument.from_args(args, "pack_dictionary"):
+        return run(args)
+
+
+def run(args: argparse.Namespace):
     try:
         archives = pack_directory(
             source_dir=args.source,
             output_dir=args.output,
             formats=args.formats,
             base_name=args.name,
+            workers=args.workers,
+            zstd_dict_size=args.zstd_dict_size,
+            zstd_level=args.zstd_level,
         )
 
         if archives:
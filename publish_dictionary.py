@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Publish the dictionary as content-addressed static files for CDN hosting.
+
+Each entry is minified and written to ``entries/<hash>.json`` together with
+precompressed ``.gz`` and ``.br`` copies. ``manifest.json`` maps lookup keys
+to those paths, so entries can be cached as immutable and a release only
+has to invalidate the manifest.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from lib import instrument
+from lib.corpus import CorpusPass, Record, iter_dictionary_files, scan_corpus
+
+ENTRIES_DIR = "entries"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 16
+
+# Cache rules in the _headers format understood by Cloudflare Pages and
+# Netlify; other CDNs need the same rules configured by hand.
+HEADERS = f"""/{ENTRIES_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+/{MANIFEST_NAME}
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+INDEX_HEADERS = """/index.html
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompressed_paths(path: Path, use_brotli: bool) -> List[Path]:
+    """Files written for ``path``, with the uncompressed file last."""
+    paths = [Path(f"{path}.gz")]
+    if use_brotli:
+        paths.append(Path(f"{path}.br"))
+    paths.append(path)
+    return paths
+
+
+def _replace(path: Path, data: bytes) -> None:
+    # Identical entries share a hash, so another worker may be writing the
+    # same target; each writer needs its own temporary file.
+    handle, name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    temporary = Path(name)
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(data)
+        # mkstemp creates the file readable by its owner only.
+        temporary.chmod(0o644)
+        os.replace(temporary, path)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+        if not path.exists():
+            raise
+
+
+def write_precompressed(path: Path, raw: bytes, use_brotli: bool) -> None:
+    """
+    Write ``raw`` to ``path`` with gzip and, if requested, brotli copies.
+
+    Every file is written to a temporary name and moved into place, and the
+    uncompressed file comes last, so an interrupted run never leaves a
+    partial file or a plain file without its compressed copies.
+    """
+    brotli = _brotli() if use_brotli else None
+    for target in precompressed_paths(path, brotli is not None):
+        if target.name.endswith(".gz"):
+            _replace(target, gzip.compress(raw, compresslevel=9, mtime=0))
+        elif target.name.endswith(".br"):
+            _replace(target, brotli.compress(raw, quality=11))
+        else:
+            _replace(target, raw)
+
+
+class PublishPass(CorpusPass):
+    """
+    Write content-hashed, precompressed entries and collect the manifest.
+
+    Hashing and compression happen in the workers. Entries whose files
+    (including every compressed copy) already exist are left alone, so
+    republishing only writes changed entries and older hashes stay available
+    to clients holding a previous manifest. Entries that failed an earlier
+    validate pass are not published. ``index_html`` is copied to the site
+    root when it exists.
+    """
+
+    name = "publish"
+
+    def __init__(
+        self,
+        output_dir: Path,
+        use_brotli: bool = True,
+        index_html: Optional[Path] = Path("index.html"),
+    ) -> None:
+        self.output_dir = output_dir
+        self.use_brotli = use_brotli
+        self.index_html = index_html
+
+    def begin(self) -> None:
+        if self.use_brotli and _brotli() is None:
+            print(
+                "Warning: 'brotli' is not installed, skipping .br copies "
+                "(uv sync --extra publish)",
+                file=sys.stderr,
+            )
+            self.use_brotli = False
+        (self.output_dir / ENTRIES_DIR).mkdir(parents=True, exist_ok=True)
+        self._manifest: Dict[str, str] = {}
+        self._written = 0
+        self._skipped = 0
+
+    def process(self, record: Record) -> Any:
+        if record.error is not None:
+            return None
+        if record.invalid:
+            return False
+
+        raw = json.dumps(record.data, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        digest = hashlib.sha256(raw).hexdigest()[:HASH_LENGTH]
+        relative = f"{ENTRIES_DIR}/{digest}.json"
+        target = self.output_dir / relative
+        if all(path.exists() for path in precompressed_paths(target, self.use_brotli)):
+            return relative, False
+
+        write_precompressed(target, raw, self.use_brotli)
+        return relative, True
+
+    def collect(self, path: Path, result: Any) -> None:
+        if result is None:
+            self._skipped += 1
+            print(f"Skipping {path}: not valid JSON", file=sys.stderr)
+            return
+        if result is False:
+            self._skipped += 1
+            print(f"Skipping {path}: failed validation", file=sys.stderr)
+            return
+
+        relative, written = result
+        self._manifest[path.stem] = relative
+        self._written += written
+
+    def finish(self) -> int:
+        manifest = {"version": 1, "entries": self._manifest}
+        write_precompressed(
+            self.output_dir / MANIFEST_NAME,
+            json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            ),
+            self.use_brotli,
+        )
+        headers = HEADERS
+        if self.index_html is not None and self.index_html.is_file():
+            shutil.copyfile(self.index_html, self.output_dir / "index.html")
+            headers += INDEX_HEADERS
+        (self.output_dir / "_headers").write_text(headers, encoding="utf-8")
+        print(
+            f"Published {len(self._manifest)} entries to {self.output_dir} "
+            f"({self._written} new, {len(self._manifest) - self._written} unchanged, "
+            f"{self._skipped} skipped)."
+        )
+        return 1 if self._skipped else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Publish content-hashed, precompressed dictionary entries."
+    )
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=Path("dictionary"),
+        help="Source directory with JSON entries (default: dictionary)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("site"),
+        help="Output directory for the static site (default: site)",
+    )
+    parser.add_argument(
+        "--index-html",
+        type=Path,
+        default=Path("index.html"),
+        help="Page copied to the site root (default: index.html)",
+    )
+    parser.add_argument(
+        "--no-brotli",
+        action="store_true",
+        help="Only write gzip copies",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes used to read the corpus (default: CPU count)",
+    )
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument.from_args(args, "publish_dictionary"):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    try:
+        files = iter_dictionary_files(args.source)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    publish = PublishPass(
+        args.output, use_brotli=not args.no_brotli, index_html=args.index_html
+    )
+    return scan_corpus(files, [publish], workers=args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Run several post-processing passes over the dictionary in a single scan.
+
+Each entry is read and decoded once; validation, cleaning, statistics,
+field template, index building, the comparison graph, packing and CDN
+publishing all share that read.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from check_json_structure import (
+    ValidatePass,
+    build_schema,
+    extract_example_jsons,
+    extract_system_instructions,
+)
+from clean_json_entries import CleanPass
+from lib import instrument
+from lib.corpus import (
+    CorpusPass,
+    IndexPass,
+    StatsPass,
+    TemplatePass,
+    iter_dictionary_files,
+    scan_corpus,
+)
+from lib.graph import GraphPass
+from pack_dictionary import ARCHIVE_SUFFIXES, PackPass
+from publish_dictionary import PublishPass
+
+# Passes run in this order regardless of how they are listed on the command
+# line, so that packing and indexing see entries after cleaning.
+PASS_ORDER = [
+    "clean",
+    "validate",
+    "stats",
+    "template",
+    "index",
+    "graph",
+    "pack",
+    "publish",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run post-processing passes over the dictionary in one scan."
+    )
+    parser.add_argument(
+        "--dictionary-dir",
+        type=Path,
+        default=Path("dictionary"),
+        help="Directory containing JSON dictionary entries.",
+    )
+    parser.add_argument(
+        "--passes",
+        nargs="+",
+        choices=PASS_ORDER,
+        default=["validate", "stats"],
+        help="Passes to run (default: validate stats).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("dist"),
+        help=(
+            "Directory for stats, template, index, comparison graph, archives "
+            "and the published site (default: dist)."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes used to scan the corpus (default: CPU count).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Stop after scanning this many files.",
+    )
+    parser.add_argument(
+        "--instructions-file",
+        type=Path,
+        default=Path("lib/query.py"),
+        help="File that defines system_instructions (validate pass).",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Display successful validations as well (validate pass).",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Write cleaned data back to disk (clean pass).",
+    )
+    parser.add_argument(
+        "--indent",
+        type=int,
+        default=2,
+        help="Indentation level for rewritten JSON files (clean pass).",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(ARCHIVE_SUFFIXES),
+        default=["zip", "tar.gz"],
+        help="Archive formats to create (pack pass, default: zip tar.gz).",
+    )
+    parser.add_argument(
+        "--name",
+        default="open-c2e-dictionary",
+        help="Base name for output archives (pack pass).",
+    )
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument.from_args(args, "scan_corpus"):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    requested = set(args.passes)
+    passes: List[CorpusPass] = []
+    for name in PASS_ORDER:
+        if name not in requested:
+            continue
+        if name == "clean":
+            passes.append(CleanPass(apply=args.apply, indent=args.indent))
+        elif name == "validate":
+            try:
+                instructions = extract_system_instructions(args.instructions_file)
+            except ValueError as exc:
+                print(f"Error: {exc}", file=sys.stderr)
+                return 1
+            examples = extract_example_jsons(instructions)
+            if not examples:
+                print(
+                    "Error: No JSON examples could be parsed from system_instructions.",
+                    file=sys.stderr,
+                )
+                return 1
+            # Entries that fail are left out of pack and publish; deleting
+            # them is left to check_json_structure.py.
+            passes.append(
+                ValidatePass(build_schema(examples), verbose=args.verbose, prompt=False)
+            )
+        elif name == "stats":
+            passes.append(StatsPass(args.output / "stats.json"))
+        elif name == "template":
+            passes.append(TemplatePass(args.output / "template.json"))
+        elif name == "index":
+            passes.append(IndexPass(args.output / "index.json"))
+        elif name == "graph":
+            passes.append(
+                GraphPass(
+                    args.output / "comparison.graph",
+                    args.output / "missing_comparisons.txt",
+                    args.output / "ungeneratable_comparisons.txt",
+                )
+            )
+        elif name == "pack":
+            passes.append(
+                PackPass(
+                    args.output,
+                    args.formats,
+                    args.name,
+                    arcname_root=args.dictionary_dir.name,
+                )
+            )
+        elif name == "publish":
+            passes.append(PublishPass(args.output / "site"))
+
+    try:
+        files = iter_dictionary_files(args.dictionary_dir)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    if args.limit is not None:
+        files = files[: args.limit]
+
+    return scan_corpus(files, passes, workers=args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())